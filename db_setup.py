@@ -0,0 +1,27 @@
+"""
+Shared database setup for the migration and validation scripts.
+"""
+import os
+
+# Database location, resolved once at import
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INSTANCE_DIR = os.path.join(BASE_DIR, 'instance')
+DATABASE_PATH = os.path.join(INSTANCE_DIR, 'inventory.db')
+
+# Ensure instance directory exists
+os.makedirs(INSTANCE_DIR, exist_ok=True)
+
+# Connection tuning for write-heavy scripts: WAL journaling with
+# synchronous=NORMAL avoids an fsync per small commit.
+SQLITE_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-65536;
+"""
+
+def tune_database(extra_pragmas=''):
+    """Apply performance PRAGMAs to the current app context's connection."""
+    from src.utils.db import get_db
+    get_db().executescript(SQLITE_PRAGMAS + extra_pragmas)
@@ -7,14 +7,17 @@ import argparse
 from flask import Flask
 from src.utils.migration import migrate_from_json, extract_localstorage_from_html
 from src.utils.db import init_db
+from db_setup import DATABASE_PATH, tune_database
+
+# A larger autocheckpoint threshold defers checkpoint fsyncs during bulk imports
+MIGRATION_PRAGMAS = """
+PRAGMA wal_autocheckpoint=10000;
+"""
 
 def create_app():
     """Create a minimal Flask app for migration."""
     app = Flask(__name__)
-    app.config['DATABASE'] = os.path.join(os.path.dirname(__file__), 'instance', 'inventory.db')
-    
-    # Ensure instance directory exists
-    os.makedirs(os.path.dirname(app.config['DATABASE']), exist_ok=True)
+    app.config['DATABASE'] = DATABASE_PATH
     
     return app
 
@@ -25,6 +28,7 @@ def migrate_from_file(file_path):
     with app.app_context():
         # Initialize database
         init_db()
+        tune_database(MIGRATION_PRAGMAS)
         
         # Check file type
         if file_path.endswith('.json'):